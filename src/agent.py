@@ -12,9 +12,11 @@ from livekit.agents import (
     inference,
     room_io,
 )
-from livekit.plugins import noise_cancellation, silero
+from livekit.plugins import noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+from vad_utils import load_warmed_vad
+
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
@@ -51,7 +53,8 @@ server = AgentServer()
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # Shared tuned VAD config + ONNX warmup; see vad_utils.py
+    proc.userdata["vad"] = load_warmed_vad()
 
 
 server.setup_fnc = prewarm
@@ -123,4 +126,13 @@ async def my_agent(ctx: JobContext):
 
 
 if __name__ == "__main__":
+    # Use uvloop's C event loop when available; agent code paths are many
+    # small awaits per audio frame and benefit from the cheaper scheduler
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     cli.run_app(server)
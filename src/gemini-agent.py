@@ -1,8 +1,9 @@
 import logging
+import os
 from dotenv import load_dotenv
 
-import os
-from mem0 import AsyncMemoryClient
+from mem0_mixin import Mem0Mixin, warm_mem0
+from vad_utils import load_warmed_vad
 
 from livekit import rtc
 from livekit.agents import (
@@ -12,15 +13,10 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     cli,
-    inference,
     room_io,
-    ChatContext,
-    ChatMessage,
-    llm,
 )
 
 from livekit.plugins import (
-    silero,
     noise_cancellation,
 )
 
@@ -35,11 +31,6 @@ logging.basicConfig(level=logging.INFO)
 
 load_dotenv(".env.local")
 
-# Mem0 client
-mem0_client = AsyncMemoryClient(
-    api_key=os.environ["MEM0_API_KEY"]
-)
-
 # Stable user ID for memory
 MEM0_USER_ID = "livekit-voice-user"
 
@@ -47,7 +38,7 @@ MEM0_USER_ID = "livekit-voice-user"
 # -------------------------------------------------
 # Agent with Mem0 Memory
 # -------------------------------------------------
-class MemoryAssistant(Agent):
+class MemoryAssistant(Mem0Mixin, Agent):
     def __init__(self) -> None:
         super().__init__(
             instructions=(
@@ -55,125 +46,11 @@ class MemoryAssistant(Agent):
                 "You can remember past conversations and use them to give better answers. "
                 "You respond concisely, clearly, and naturally without emojis or special formatting. "
                 "You are friendly, curious, and slightly humorous."
-            )
+            ),
+            mem0_user_id=MEM0_USER_ID,
+            search_limit=5,
+            store_assistant_turns=True,
         )
-        self._last_user_message = None
-        self._last_assistant_message = None
-
-    async def on_enter(self):
-        """Called when agent enters the session."""
-        await super().on_enter()
-        # Optionally retrieve and inject initial context from Mem0
-        try:
-            logger.info("Retrieving initial context from Mem0")
-            search_results = await mem0_client.search(
-                "recent conversation context",
-                filters={"AND": [{"user_id": MEM0_USER_ID}]},
-                limit=3,
-            )
-            
-            results = search_results.get("results", []) if isinstance(search_results, dict) else search_results
-            memories = []
-            
-            for result in results:
-                memory_text = result.get("memory") or result.get("text")
-                if memory_text:
-                    memories.append(memory_text)
-            
-            if memories:
-                context = "Previous context: " + " | ".join(memories)
-                logger.info(f"Initial memory context: {context}")
-                # You could inject this into the initial prompt or instructions
-                
-        except Exception as e:
-            logger.warning(f"Failed to retrieve initial context: {e}")
-
-    async def on_user_turn_completed(
-        self,
-        turn_ctx: ChatContext,
-        new_message: ChatMessage,
-    ) -> None:
-        """This is called after user completes their turn."""
-        user_text = new_message.text_content
-        
-        if not user_text or len(user_text.strip()) < 5:
-            return await super().on_user_turn_completed(turn_ctx, new_message)
-
-        self._last_user_message = user_text
-        logger.info(f"User said: {user_text}")
-
-        # Store user message in Mem0
-        try:
-            logger.info(f"Storing user message in Mem0: {user_text}")
-            await mem0_client.add(
-                [{"role": "user", "content": user_text}],
-                user_id=MEM0_USER_ID,
-            )
-        except Exception as e:
-            logger.warning(f"Mem0 add failed: {e}")
-
-        # Retrieve relevant memories
-        try:
-            search_results = await mem0_client.search(
-                user_text,
-                filters={"AND": [{"user_id": MEM0_USER_ID}]},
-                limit=5,
-            )
-
-            memories = []
-            results = search_results.get("results", []) if isinstance(search_results, dict) else search_results
-
-            for result in results:
-                memory_text = result.get("memory") or result.get("text")
-                if memory_text:
-                    memories.append(memory_text)
-
-            if memories:
-                memory_block = "\n\n".join(memories)
-                logger.info(f"Injecting memory context:\n{memory_block}")
-
-                # Inject memory as system context
-                turn_ctx.add_message(
-                    role="assistant",
-                    content=(
-                        "Relevant information from previous conversations:\n\n"
-                        f"{memory_block}"
-                    ),
-                )
-                await self.update_chat_ctx(turn_ctx)
-
-        except Exception as e:
-            logger.warning(f"Mem0 search failed: {e}")
-
-        await super().on_user_turn_completed(turn_ctx, new_message)
-
-    async def on_agent_turn_completed(
-        self,
-        turn_ctx: ChatContext,
-    ) -> None:
-        """Called after the agent completes its turn - this is where we capture the response."""
-        
-        # Get the last message from the assistant
-        assistant_messages = [msg for msg in turn_ctx.messages if msg.role == "assistant"]
-        
-        if assistant_messages:
-            last_response = assistant_messages[-1].text_content
-            
-            if last_response and last_response != self._last_assistant_message:
-                self._last_assistant_message = last_response
-                logger.info(f"Assistant said: {last_response}")
-                
-                # Store assistant response in Mem0
-                try:
-                    logger.info(f"Storing assistant response in Mem0: {last_response}")
-                    await mem0_client.add(
-                        [{"role": "assistant", "content": last_response}],
-                        user_id=MEM0_USER_ID,
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to store assistant response: {e}")
-        
-        await super().on_agent_turn_completed(turn_ctx)
 
 
 # -------------------------------------------------
@@ -182,8 +59,18 @@ class MemoryAssistant(Agent):
 server = AgentServer()
 
 
+# Gemini native audio does its own endpointing, so a second local VAD costs
+# an ONNX inference per audio frame for little gain and can fight the
+# model's turn detection. Off by default here; set USE_LOCAL_VAD=1 to A/B.
+USE_LOCAL_VAD = os.environ.get("USE_LOCAL_VAD", "0").lower() in ("1", "true", "yes")
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # Build the Mem0 client here so the first turn doesn't pay creation cost
+    warm_mem0()
+    if USE_LOCAL_VAD:
+        # Shared tuned VAD config + ONNX warmup; see vad_utils.py
+        proc.userdata["vad"] = load_warmed_vad()
 
 
 server.setup_fnc = prewarm
@@ -197,7 +84,12 @@ async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {
         "room": ctx.room.name,
     }
-    
+
+    # The local turn detector requires a VAD, so both ride the USE_LOCAL_VAD
+    # A/B together; without it, Gemini's server-side turn detection is
+    # authoritative and constructing the model would only get it discarded
+    # with a per-session warning.
+    vad = ctx.proc.userdata.get("vad")
     session = AgentSession(
         llm=google.beta.realtime.RealtimeModel(
             model="gemini-2.5-flash-native-audio-preview-12-2025",
@@ -205,8 +97,8 @@ async def entrypoint(ctx: JobContext):
             voice="Aoede",
             enable_affective_dialog=True,
         ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=MultilingualModel() if vad is not None else None,
+        vad=vad,
         preemptive_generation=True,
     )
 
@@ -232,4 +124,13 @@ async def entrypoint(ctx: JobContext):
 # Run
 # -------------------------------------------------
 if __name__ == "__main__":
-    cli.run_app(server)
\ No newline at end of file
+    # Use uvloop's C event loop when available; agent code paths are many
+    # small awaits per audio frame and benefit from the cheaper scheduler
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
+    cli.run_app(server)
@@ -1,7 +1,10 @@
 import logging
+import os
+
 from dotenv import load_dotenv
 
-from mem0 import AsyncMemoryClient
+from mem0_mixin import Mem0Mixin, warm_mem0
+from vad_utils import load_warmed_vad
 
 from livekit.agents import (
     JobContext,
@@ -14,7 +17,7 @@ from livekit.agents import (
     ChatMessage,
     room_io,
 )
-from livekit.plugins import silero, google
+from livekit.plugins import google
 
 # -----------------------------------------------------------------------------
 # Setup
@@ -29,11 +32,20 @@ server = AgentServer()
 
 # Mem0
 RAG_USER_ID = "livekit-gemini-realtime"
-mem0_client = AsyncMemoryClient()
+
+
+# Gemini native audio does its own endpointing, so a second local VAD costs
+# an ONNX inference per audio frame for little gain and can fight the
+# model's turn detection. Off by default here; set USE_LOCAL_VAD=1 to A/B.
+USE_LOCAL_VAD = os.environ.get("USE_LOCAL_VAD", "0").lower() in ("1", "true", "yes")
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # Build the Mem0 client here so the first turn doesn't pay creation cost
+    warm_mem0()
+    if USE_LOCAL_VAD:
+        # Shared tuned VAD config + ONNX warmup; see vad_utils.py
+        proc.userdata["vad"] = load_warmed_vad()
 
 
 server.setup_fnc = prewarm
@@ -42,14 +54,17 @@ server.setup_fnc = prewarm
 # Memory-Enabled Gemini Agent
 # -----------------------------------------------------------------------------
 
-class MemoryEnabledGeminiAgent(Agent):
+class MemoryEnabledGeminiAgent(Mem0Mixin, Agent):
     def __init__(self) -> None:
         super().__init__(
             instructions="""
             You are a helpful voice AI assistant that can see the world around you.
             You have long-term memory and should use relevant past context
             naturally and silently to improve your responses.
-            """
+            """,
+            mem0_user_id=RAG_USER_ID,
+            # 🔑 SYSTEM MESSAGE — NOT assistant
+            inject_role="system",
         )
 
     # 🔑 THIS IS THE CORRECT HOOK FOR GEMINI REALTIME
@@ -59,61 +74,16 @@ class MemoryEnabledGeminiAgent(Agent):
         message: ChatMessage,
     ) -> None:
         user_text = message.text_content
-        if not user_text:
+        if not self._worth_remembering(user_text):
             return
 
-        logger.info(f"📝 Final transcription: {user_text}")
-
-        # ------------------------------------------------------------------
-        # 1. Store user message in Mem0
-        # ------------------------------------------------------------------
-        try:
-            logger.info("[Mem0] Saving user message")
-            await mem0_client.add(
-                [{"role": "user", "content": user_text}],
-                user_id=RAG_USER_ID,
-            )
-        except Exception as e:
-            logger.warning(f"[Mem0] Add failed: {e}")
-
-        # ------------------------------------------------------------------
-        # 2. Retrieve relevant memories
-        # ------------------------------------------------------------------
-        try:
-            logger.info("[Mem0] Searching memories")
-            results = await mem0_client.search(
-                user_text,
-                user_id=RAG_USER_ID,
-            )
-
-            memories = results.get("results", []) if results else []
-            if not memories:
-                logger.info("[Mem0] No relevant memories")
-                return
-
-            context_lines = []
-            for m in memories:
-                text = m.get("memory") or m.get("text")
-                if text:
-                    context_lines.append(f"- {text}")
-
-            rag_context = (
-                "Relevant past context:\n"
-                + "\n".join(context_lines)
-            )
-
-            logger.info(f"[Mem0] Injecting SYSTEM context:\n{rag_context}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📝 Final transcription: %s", user_text[:500])
 
-            # 🔑 SYSTEM MESSAGE — NOT assistant
-            chat_ctx.add_message(
-                role="system",
-                content=rag_context,
-            )
-
-            await self.update_chat_ctx(chat_ctx)
-
-        except Exception as e:
-            logger.warning(f"[Mem0] Search failed: {e}")
+        # Save the user message in the background, then retrieve and inject
+        # relevant memories (only the search is on the critical path)
+        self._schedule_add([{"role": "user", "content": user_text}])
+        await self._recall_and_inject(chat_ctx, user_text)
 
 
 # -----------------------------------------------------------------------------
@@ -131,7 +101,7 @@ async def entrypoint(ctx: JobContext):
             voice="Aoede",
             enable_affective_dialog=True,
         ),
-        vad=ctx.proc.userdata["vad"],
+        vad=ctx.proc.userdata.get("vad"),
     )
 
     await session.start(
@@ -154,4 +124,13 @@ async def entrypoint(ctx: JobContext):
 # -----------------------------------------------------------------------------
 
 if __name__ == "__main__":
+    # Use uvloop's C event loop when available; agent code paths are many
+    # small awaits per audio frame and benefit from the cheaper scheduler
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     cli.run_app(server)
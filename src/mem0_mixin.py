@@ -0,0 +1,484 @@
+"""Shared Mem0 memory plumbing for the agents in this project.
+
+The three memory-enabled agents (gemini-agent.py, gemini-memory.py and
+memory-ai.py) all implement the same add/search/inject flow. This module
+keeps a single copy of the client handling, caching, speculative search and
+turn hooks so fixes and optimizations land once instead of three times.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+
+import httpx
+from livekit.agents import ChatContext, ChatMessage
+from mem0 import AsyncMemoryClient
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("mem0-mixin")
+
+# Skip Mem0 entirely for fillers and short confirmations ("ok", "uh huh");
+# they carry no long-term signal and each one would cost a network RPC.
+_FILLER = re.compile(
+    r"^(yes|no|ok(ay)?|sure|thanks|bye|hi|hello|uh+|um+|right)[.!? ]*$", re.I
+)
+MIN_TOKENS = 3
+MIN_CHARS = 8
+
+# Bound the injected memory block so prompt tokens (and prefill latency)
+# stay flat regardless of how verbose the stored memories are.
+MAX_PER_MEM = 240
+MAX_MEM_CHARS = 1200
+
+# Speculative search on STT partials: wait this long after the last partial
+# update, and require this much text, before firing a Mem0 lookup.
+_PARTIAL_DEBOUNCE = 0.3
+_MIN_PARTIAL_CHARS = 10
+
+# Keys that may carry the memory text in a search result, in priority order.
+_MEM_KEYS = ("memory", "text")
+
+# Small TTL'd LRU over Mem0 searches: conversational turns repeat
+# near-identical queries, and a hit skips the remote vector search entirely.
+_SEARCH_CACHE_SIZE = 128
+_SEARCH_CACHE_TTL = 60.0
+_search_cache: OrderedDict[tuple[str, str], tuple[float, list]] = OrderedDict()
+_inflight_searches: dict[tuple[str, str], asyncio.Task] = {}
+
+# Cap concurrent Mem0 RPCs per process: with many rooms on one worker an
+# unbounded fan-out can exhaust the connection pool and push every call into
+# timeout territory. 16 stays comfortably under the pool's 32 keep-alive
+# connections.
+_mem0_sem = asyncio.Semaphore(16)
+
+
+async def _mem0_call(coro):
+    """Run a Mem0 RPC under the process-wide concurrency cap."""
+    async with _mem0_sem:
+        return await coro
+
+
+# Mem0 client: created lazily so each worker process shares exactly one
+# instance, and every call reuses a warm keep-alive connection pool instead
+# of paying TCP + TLS setup per RPC.
+_mem0_client: AsyncMemoryClient | None = None
+_mem0_client_lock = asyncio.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Build the pooled transport handed to AsyncMemoryClient at construction.
+
+    mem0's constructor accepts a prebuilt client and sets base_url and auth
+    headers on it, so generous keep-alive limits are wired in up front instead
+    of swapping the transport afterwards (which left the default client open
+    and still referenced by client.project). The 300 s timeout matches the
+    client mem0 would otherwise build itself.
+    """
+    return _OrjsonAsyncClient(
+        timeout=300,
+        limits=httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=64,
+            keepalive_expiry=60,
+        ),
+    )
+
+
+class _OrjsonAsyncClient(httpx.AsyncClient):
+    """httpx AsyncClient that serializes ``json=`` bodies with orjson.
+
+    The mem0 client sends every add/search payload through httpx's ``json=``
+    path; pre-serializing it here does the same dump at C speed. Scoped to
+    this client only - orjson's semantics differ from the stdlib's (it
+    rejects ints beyond 64 bits, for one), so patching httpx's module-level
+    encoder would silently change behavior for every other client in the
+    worker. Without orjson installed this is a plain AsyncClient.
+    """
+
+    def build_request(
+        self, method, url, *, content=None, json=None, headers=None, **kwargs
+    ):
+        # content must be accepted explicitly: httpx's request helpers pass
+        # every body kwarg positionally-by-name (content=None, json=...), so
+        # leaving it in **kwargs collides with the content= we add below.
+        if json is None or content is not None or orjson is None:
+            return super().build_request(
+                method, url, content=content, json=json, headers=headers, **kwargs
+            )
+        merged = httpx.Headers(headers)
+        merged.setdefault("Content-Type", "application/json")
+        return super().build_request(
+            method, url, content=orjson.dumps(json), headers=merged, **kwargs
+        )
+
+
+def _create_client() -> AsyncMemoryClient:
+    # api_key=None lets the mem0 client fall back to its own MEM0_API_KEY
+    # env discovery
+    return AsyncMemoryClient(
+        api_key=os.environ.get("MEM0_API_KEY"), client=_build_http_client()
+    )
+
+
+def warm_mem0() -> None:
+    """Eagerly build the process-wide client, e.g. from a prewarm hook.
+
+    Client construction is synchronous (it pings the Mem0 API to validate the
+    key) and loop-agnostic, so doing it once per worker at prewarm keeps the
+    cost off the first conversational turn. Safe to call more than once;
+    failures are logged and left for get_mem0 to retry lazily.
+    """
+    global _mem0_client
+    if _mem0_client is None:
+        try:
+            _mem0_client = _create_client()
+        except Exception as e:
+            logger.warning("Mem0 client prewarm failed: %s", e)
+
+
+async def get_mem0() -> AsyncMemoryClient:
+    global _mem0_client
+    if _mem0_client is None:
+        async with _mem0_client_lock:
+            if _mem0_client is None:
+                # The constructor does a blocking HTTP ping to validate the
+                # API key; keep that off the event loop in the lazy path.
+                _mem0_client = await asyncio.to_thread(_create_client)
+    return _mem0_client
+
+
+def _trim_memories(memories: list[str]) -> list[str]:
+    """Dedupe retrieved memories and cap per-memory and total size."""
+    trimmed: list[str] = []
+    total = 0
+    for memory_text in dict.fromkeys(m[:MAX_PER_MEM] for m in memories):
+        if total + len(memory_text) > MAX_MEM_CHARS:
+            break
+        trimmed.append(memory_text)
+        total += len(memory_text)
+    return trimmed
+
+
+async def _cached_search(query: str, **kwargs):
+    """Memoized Mem0 search keyed on the normalized query and search kwargs.
+
+    Repeats within the TTL are served locally, and concurrent identical
+    queries share a single in-flight RPC. The cache is process-wide while
+    filters/limit are per-agent, so the kwargs are part of the key: two
+    agents with different user ids must never be served each other's
+    memories.
+    """
+    key = (
+        repr(sorted(kwargs.items())),
+        re.sub(r"\s+", " ", query.strip().lower())[:200],
+    )
+    now = time.monotonic()
+    hit = _search_cache.get(key)
+    if hit is not None and now - hit[0] < _SEARCH_CACHE_TTL:
+        _search_cache.move_to_end(key)
+        return hit[1]
+
+    task = _inflight_searches.get(key)
+    if task is None:
+        mem0 = await get_mem0()
+        task = asyncio.create_task(_mem0_call(mem0.search(query, **kwargs)))
+        _inflight_searches[key] = task
+        task.add_done_callback(lambda _, k=key: _inflight_searches.pop(k, None))
+
+    results = await asyncio.shield(task)
+    _search_cache[key] = (time.monotonic(), results)
+    while len(_search_cache) > _SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+    return results
+
+
+class Mem0Mixin:
+    """Mem0-backed long-term memory for livekit Agent subclasses.
+
+    Mix in ahead of Agent (``class MyAgent(Mem0Mixin, Agent)``) and pass the
+    mixin's keyword-only options alongside the usual Agent kwargs:
+
+    - ``mem0_user_id``: stable Mem0 user id for all adds and searches
+    - ``search_limit``: max results per search, or None for the server default
+    - ``inject_role``: chat role used for the injected context message
+    - ``store_assistant_turns``: when True, assistant replies are captured
+      from the session's ``conversation_item_added`` event and written
+      together with the user message as one batched add per turn
+
+    Writes run as tracked background tasks (drained in on_exit), searches go
+    through a process-wide TTL cache, and a speculative search is fired from
+    STT partials so results are usually ready when the final transcript lands.
+    """
+
+    def __init__(
+        self,
+        *args,
+        mem0_user_id: str,
+        search_limit: int | None = 5,
+        inject_role: str = "assistant",
+        store_assistant_turns: bool = False,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self._mem0_user_id = mem0_user_id
+        self._search_limit = search_limit
+        # Built once per agent and treated as frozen - never mutate these;
+        # rebuilding the identical filters dict on every search is pure waste
+        self._search_kwargs: dict = {"filters": {"AND": [{"user_id": mem0_user_id}]}}
+        if search_limit is not None:
+            self._search_kwargs["limit"] = search_limit
+        self._inject_role = inject_role
+        self._store_assistant_turns = store_assistant_turns
+        self._last_assistant_message: str | None = None
+        self._last_assistant_hash: int | None = None
+        # User message waiting to be written together with the assistant reply.
+        self._pending_user_msg: str | None = None
+        # Hash of the last injected memory block, to skip no-op context updates.
+        self._last_injected_hash: int | None = None
+        # Mem0 writes scheduled off the critical path; drained in on_exit.
+        self._bg_tasks: set[asyncio.Task] = set()
+        # Hashes of recently written content: users repeat themselves across
+        # retries and STT re-finalizations, and each duplicate would cost a
+        # full write plus server-side embedding compute.
+        self._recent_hashes: deque[bytes] = deque(maxlen=64)
+        self._recent_hash_set: set[bytes] = set()
+        # Speculative Mem0 search launched from STT partials so results are
+        # ready by the time the final transcript lands.
+        self._pending_search: asyncio.Task | None = None
+        self._pending_search_query: str | None = None
+        self._partial_debounce: asyncio.TimerHandle | None = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def on_enter(self):
+        await super().on_enter()
+        self.session.on("user_input_transcribed", self._on_user_input_transcribed)
+        if self._store_assistant_turns:
+            # Agent has no "agent turn completed" hook; committed assistant
+            # replies surface through this session event instead.
+            self.session.on("conversation_item_added", self._on_conversation_item_added)
+
+    async def on_exit(self):
+        """Drain pending Mem0 writes before leaving the session."""
+        self._flush_pending_user_msg()
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+        await super().on_exit()
+
+    # ------------------------------------------------------------------
+    # Turn hooks
+    # ------------------------------------------------------------------
+    async def on_user_turn_completed(
+        self,
+        turn_ctx: ChatContext,
+        new_message: ChatMessage,
+    ) -> None:
+        user_text = new_message.text_content
+        if not self._worth_remembering(user_text):
+            return await super().on_user_turn_completed(turn_ctx, new_message)
+
+        # Lazy %-formatting plus a level check so the (possibly long) payload
+        # is never sliced or formatted when INFO is filtered out
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("User said: %s", user_text[:500])
+
+        if self._store_assistant_turns:
+            # Flush any user message left over from a turn that never got a
+            # reply (e.g. barge-in), then hold this one to write it together
+            # with the assistant's reply as a single Mem0 call per turn.
+            self._flush_pending_user_msg()
+            self._pending_user_msg = user_text
+        else:
+            self._schedule_add([{"role": "user", "content": user_text}])
+
+        await self._recall_and_inject(turn_ctx, user_text)
+        await super().on_user_turn_completed(turn_ctx, new_message)
+
+    def _on_conversation_item_added(self, ev) -> None:
+        """Store the held user message together with the assistant reply.
+
+        The event delivers the committed item directly, so no history scan is
+        needed; everything except message items with an assistant role is
+        ignored (user items are already handled in on_user_turn_completed).
+        """
+        item = ev.item
+        if getattr(item, "type", None) != "message" or item.role != "assistant":
+            return
+        last_response = item.text_content
+        if not last_response:
+            return
+
+        # Cheap hash check first; full string compare only on a hash match to
+        # rule out collisions
+        response_hash = hash(last_response)
+        if (
+            response_hash == self._last_assistant_hash
+            and last_response == self._last_assistant_message
+        ):
+            return
+        self._last_assistant_message = last_response
+        self._last_assistant_hash = response_hash
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Storing turn in Mem0: %s", last_response[:200])
+
+        # Store the full turn as one batched call (off the critical path)
+        messages = []
+        if self._pending_user_msg is not None:
+            messages.append({"role": "user", "content": self._pending_user_msg})
+            self._pending_user_msg = None
+        messages.append({"role": "assistant", "content": last_response})
+        self._schedule_add(messages)
+
+    # ------------------------------------------------------------------
+    # Store path
+    # ------------------------------------------------------------------
+    def _worth_remembering(self, text: str | None) -> bool:
+        """Gate out fillers and short confirmations before any Mem0 RPC."""
+        stripped = text.strip() if text else ""
+        return not (
+            len(stripped) < MIN_CHARS
+            or len(stripped.split()) < MIN_TOKENS
+            or _FILLER.match(stripped)
+        )
+
+    def _seen_recently(self, text: str) -> bool:
+        """Record a content hash, reporting whether it was already present."""
+        h = hashlib.blake2b(text.strip().lower().encode(), digest_size=8).digest()
+        if h in self._recent_hash_set:
+            return True
+        if len(self._recent_hashes) == self._recent_hashes.maxlen:
+            self._recent_hash_set.discard(self._recent_hashes[0])
+        self._recent_hashes.append(h)
+        self._recent_hash_set.add(h)
+        return False
+
+    def _schedule_add(self, messages: list[dict]) -> None:
+        """Fire-and-forget a Mem0 write so it overlaps with LLM generation."""
+        messages = [m for m in messages if not self._seen_recently(m["content"])]
+        if not messages:
+            return
+        task = asyncio.create_task(self._safe_add(messages))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+
+    async def _safe_add(self, messages: list[dict]) -> None:
+        try:
+            mem0 = await get_mem0()
+            await _mem0_call(mem0.add(messages, user_id=self._mem0_user_id))
+        except Exception as e:
+            logger.warning("Mem0 add failed: %s", e)
+
+    def _flush_pending_user_msg(self) -> None:
+        """Write a user message whose turn never produced an assistant reply."""
+        if self._pending_user_msg is not None:
+            self._schedule_add([{"role": "user", "content": self._pending_user_msg}])
+            self._pending_user_msg = None
+
+    # ------------------------------------------------------------------
+    # Recall path
+    # ------------------------------------------------------------------
+    async def _recall_and_inject(self, ctx: ChatContext, query: str) -> None:
+        """Search Mem0 for context relevant to `query` and inject it."""
+        try:
+            search_results = await self._take_speculative_search(query)
+            if search_results is None:
+                search_results = await _cached_search(query, **self._search_kwargs)
+
+            results = (
+                search_results["results"]
+                if isinstance(search_results, dict) and "results" in search_results
+                else search_results or []
+            )
+            # Single-pass extraction: first matching key per result, skipping
+            # results that carry neither
+            memories = [
+                t
+                for r in results
+                for t in (next((r[k] for k in _MEM_KEYS if k in r), None),)
+                if t
+            ]
+
+            memories = _trim_memories(memories)
+            if not memories:
+                return
+
+            memory_block = "\n\n".join(memories)
+
+            # Injecting the same block again would only force the LLM side to
+            # reprocess an unchanged context; skip the no-op update
+            block_hash = hash(memory_block)
+            if block_hash == self._last_injected_hash:
+                return
+            self._last_injected_hash = block_hash
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Injecting memory context:\n%s", memory_block[:500])
+
+            ctx.add_message(
+                role=self._inject_role,
+                content=(
+                    "Relevant information from previous conversations:\n\n"
+                    f"{memory_block}"
+                ),
+            )
+            await self.update_chat_ctx(ctx)
+
+        except Exception as e:
+            logger.warning("Mem0 search failed: %s", e)
+
+    # ------------------------------------------------------------------
+    # Speculative search on STT partials
+    # ------------------------------------------------------------------
+    def _on_user_input_transcribed(self, ev) -> None:
+        """Debounce STT partials and kick off a speculative memory search
+        while the user is still speaking."""
+        if ev.is_final:
+            return
+        partial = (ev.transcript or "").strip()
+        if len(partial) < _MIN_PARTIAL_CHARS:
+            return
+        if self._partial_debounce is not None:
+            self._partial_debounce.cancel()
+        self._partial_debounce = asyncio.get_running_loop().call_later(
+            _PARTIAL_DEBOUNCE, self._start_speculative_search, partial
+        )
+
+    def _start_speculative_search(self, partial: str) -> None:
+        if self._pending_search is not None and not self._pending_search.done():
+            self._pending_search.cancel()
+        self._pending_search_query = partial
+        self._pending_search = asyncio.create_task(
+            _cached_search(partial, **self._search_kwargs)
+        )
+
+    async def _take_speculative_search(self, final_text: str):
+        """Return speculative results if they match the final transcript.
+
+        Results are only reused when the speculative query is a prefix of
+        the final text; otherwise the task is cancelled and we fall back to
+        a fresh search.
+        """
+        task, query = self._pending_search, self._pending_search_query
+        self._pending_search = None
+        self._pending_search_query = None
+        if self._partial_debounce is not None:
+            self._partial_debounce.cancel()
+            self._partial_debounce = None
+        if task is None:
+            return None
+        if query and final_text.strip().lower().startswith(query.lower()):
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), timeout=1.0)
+            except Exception:
+                return None
+        task.cancel()
+        return None
@@ -1,8 +1,8 @@
 import logging
 from dotenv import load_dotenv
 
-import os
-from mem0 import AsyncMemoryClient
+from mem0_mixin import Mem0Mixin, warm_mem0
+from vad_utils import load_warmed_vad
 
 from livekit import rtc
 from livekit.agents import (
@@ -14,12 +14,9 @@ from livekit.agents import (
     cli,
     inference,
     room_io,
-    ChatContext,
-    ChatMessage,
 )
 
 from livekit.plugins import (
-    silero,
     noise_cancellation,
 )
 
@@ -33,11 +30,6 @@ logging.basicConfig(level=logging.INFO)
 
 load_dotenv(".env.local")
 
-# Mem0 client
-mem0_client = AsyncMemoryClient(
-    api_key=os.environ["MEM0_API_KEY"]
-)
-
 # Stable user ID for memory (you can later swap this for participant identity)
 MEM0_USER_ID = "livekit-voice-user"
 
@@ -45,7 +37,7 @@ MEM0_USER_ID = "livekit-voice-user"
 # -------------------------------------------------
 # Agent with Mem0 Memory
 # -------------------------------------------------
-class MemoryAssistant(Agent):
+class MemoryAssistant(Mem0Mixin, Agent):
     def __init__(self) -> None:
         super().__init__(
             instructions=(
@@ -53,76 +45,10 @@ class MemoryAssistant(Agent):
                 "You can remember past conversations and use them to give better answers. "
                 "You respond concisely, clearly, and naturally without emojis or special formatting. "
                 "You are friendly, curious, and slightly humorous."
-            )
+            ),
+            mem0_user_id=MEM0_USER_ID,
         )
 
-    async def on_user_turn_completed(
-        self,
-        turn_ctx: ChatContext,
-        new_message: ChatMessage,
-    ) -> None:
-        user_text = new_message.text_content
-        if not user_text:
-            return await super().on_user_turn_completed(turn_ctx, new_message)
-        
-        if len(user_text.strip()) < 5:
-            await super().on_user_turn_completed(turn_ctx, new_message)
-            return
-
-        # -----------------------------
-        # 1. Store user message in Mem0
-        # -----------------------------
-        try:
-            logger.info(f"Storing message in Mem0: {user_text}")
-            await mem0_client.add(
-                [{"role": "user", "content": user_text}],
-                user_id=MEM0_USER_ID,
-            )
-        except Exception as e:
-            logger.warning(f"Mem0 add failed: {e}")
-
-        # -----------------------------
-        # 2. Retrieve relevant memories
-        # -----------------------------
-        try:
-            # Use the named 'query' argument
-            search_results = await mem0_client.search(
-                user_text,
-                filters={"AND": [{"user_id": MEM0_USER_ID}]},
-            )
-
-            # Note: Mem0 V2 sometimes returns a list directly or a dict with a 'results' key.
-            # The official example you provided expects a dict.
-            memories = []
-            
-            # Adding a safety check for the structure
-            results = search_results.get("results", []) if isinstance(search_results, dict) else search_results
-
-            for result in results:
-                memory_text = result.get("memory") or result.get("text")
-                if memory_text:
-                    memories.append(memory_text)
-
-            if memories:
-                memory_block = "\n\n".join(memories)
-                logger.info(f"Injecting memory context:\n{memory_block}")
-
-                turn_ctx.add_message(
-                    role="assistant",
-                    content=(
-                        "Relevant information from previous conversations:\n\n"
-                        f"{memory_block}"
-                    ),
-                )
-                await self.update_chat_ctx(turn_ctx)
-
-        except Exception as e:
-            logger.warning(f"Mem0 search failed: {e}")
-
-
-
-        await super().on_user_turn_completed(turn_ctx, new_message)
-
 
 # -------------------------------------------------
 # Server + Prewarm
@@ -131,7 +57,10 @@ server = AgentServer()
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # Build the Mem0 client here so the first turn doesn't pay creation cost
+    warm_mem0()
+    # Shared tuned VAD config + ONNX warmup; see vad_utils.py
+    proc.userdata["vad"] = load_warmed_vad()
 
 
 server.setup_fnc = prewarm
@@ -185,4 +114,13 @@ async def entrypoint(ctx: JobContext):
 # Run
 # -------------------------------------------------
 if __name__ == "__main__":
+    # Use uvloop's C event loop when available; agent code paths are many
+    # small awaits per audio frame and benefit from the cheaper scheduler
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     cli.run_app(server)
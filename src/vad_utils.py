@@ -0,0 +1,53 @@
+"""Shared Silero VAD configuration and warmup for the agents in this project.
+
+Every entrypoint loads the same tuned VAD from its prewarm hook; keeping the
+endpointing config and the ONNX warmup here means changes land once instead
+of once per agent. Lives apart from mem0_mixin so agents without memory can
+use it too.
+"""
+
+import logging
+import os
+
+from livekit.plugins import silero
+
+logger = logging.getLogger("vad-utils")
+
+# Explicit endpointing tuned for conversational turn-taking: the lower 0.4
+# activation threshold detects speech onset a little sooner than the plugin
+# default, while the 2 s silence window holds end-of-turn well beyond the
+# default 0.55 s so users aren't cut off mid-thought. Tune via env: lower
+# VAD_MIN_SILENCE for snappier hand-offs, or widen it for flows that need
+# longer pauses (e.g. VAD_MIN_SILENCE=4.0 while capturing phone numbers,
+# applied live with vad.update_options(min_silence_duration=...)).
+VAD_MIN_SILENCE = float(os.environ.get("VAD_MIN_SILENCE", "2.0"))
+
+
+def _warmup_vad(vad: silero.VAD, *, windows: int = 10) -> None:
+    """Push a few zero windows through the ONNX session so the first real
+    audio frame hits warmed kernels instead of tripping the plugin's
+    slower-than-realtime warning."""
+    try:
+        import numpy as np
+        from livekit.plugins.silero.onnx_model import OnnxModel
+
+        model = OnnxModel(onnx_session=vad._onnx_session, sample_rate=16000)
+        window = np.zeros(model.window_size_samples, dtype=np.float32)
+        for _ in range(windows):
+            model(window)
+    except Exception as e:
+        logger.warning("VAD warmup skipped: %s", e)
+
+
+def load_warmed_vad() -> silero.VAD:
+    """Load the tuned VAD and warm it; call once per worker from prewarm."""
+    vad = silero.VAD.load(
+        min_speech_duration=0.1,
+        min_silence_duration=VAD_MIN_SILENCE,
+        prefix_padding_duration=0.2,
+        activation_threshold=0.4,
+        sample_rate=16000,
+    )
+    # Warm up once per worker process, before real-time constraints apply
+    _warmup_vad(vad)
+    return vad
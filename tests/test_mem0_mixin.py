@@ -0,0 +1,176 @@
+"""Unit tests for the pure-logic helpers in mem0_mixin.
+
+These run without any network or Mem0 credentials: the store/recall gates,
+memory trimming and the search cache are all exercised against fakes.
+"""
+
+import json as stdlib_json
+
+import httpx
+import pytest
+
+import mem0_mixin
+from mem0_mixin import (
+    MAX_MEM_CHARS,
+    MAX_PER_MEM,
+    Mem0Mixin,
+    _cached_search,
+    _trim_memories,
+)
+
+
+@pytest.fixture
+def mixin() -> Mem0Mixin:
+    return Mem0Mixin(mem0_user_id="test-user")
+
+
+@pytest.fixture(autouse=True)
+def _clear_search_cache():
+    mem0_mixin._search_cache.clear()
+    mem0_mixin._inflight_searches.clear()
+    yield
+    mem0_mixin._search_cache.clear()
+    mem0_mixin._inflight_searches.clear()
+
+
+def test_worth_remembering_accepts_substantive_text(mixin: Mem0Mixin) -> None:
+    assert mixin._worth_remembering("I live in Berlin and I love hiking")
+
+
+def test_worth_remembering_rejects_empty_and_short(mixin: Mem0Mixin) -> None:
+    assert not mixin._worth_remembering(None)
+    assert not mixin._worth_remembering("   ")
+    assert not mixin._worth_remembering("hi")
+    # Long enough in characters, but too few tokens
+    assert not mixin._worth_remembering("understood!")
+
+
+def test_seen_recently_dedupes_normalized_content(mixin: Mem0Mixin) -> None:
+    assert not mixin._seen_recently("My name is Ada Lovelace")
+    assert mixin._seen_recently("My name is Ada Lovelace")
+    # Hashing is over stripped, lowercased text
+    assert mixin._seen_recently("  my name is ADA lovelace ")
+
+
+def test_seen_recently_evicts_oldest(mixin: Mem0Mixin) -> None:
+    maxlen = mixin._recent_hashes.maxlen
+    mixin._seen_recently("first message for the dedupe window")
+    for i in range(maxlen):
+        mixin._seen_recently(f"filler message number {i}")
+    # The first entry fell out of the window, so it counts as new again
+    assert not mixin._seen_recently("first message for the dedupe window")
+
+
+def test_trim_memories_dedupes_and_caps() -> None:
+    long = "x" * (MAX_PER_MEM + 100)
+    trimmed = _trim_memories(["remember this", "remember this", long])
+    assert trimmed == ["remember this", "x" * MAX_PER_MEM]
+
+    many = [f"memory {i} " + "y" * MAX_PER_MEM for i in range(10)]
+    trimmed = _trim_memories(many)
+    assert sum(len(m) for m in trimmed) <= MAX_MEM_CHARS
+    assert len(trimmed) < len(many)
+
+
+class _OrjsonStub:
+    @staticmethod
+    def dumps(obj) -> bytes:
+        return stdlib_json.dumps(obj).encode()
+
+
+def _capture_transport(captured: dict) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured["body"] = request.content
+        captured["content_type"] = request.headers.get("content-type")
+        return httpx.Response(200, json={"ok": True})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_orjson_client_encodes_json_posts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # post(json=...) is the path every mem0 add/search goes through; httpx
+    # passes content=None explicitly alongside json, which the override must
+    # tolerate
+    monkeypatch.setattr(mem0_mixin, "orjson", _OrjsonStub)
+    captured: dict = {}
+    async with mem0_mixin._OrjsonAsyncClient(
+        transport=_capture_transport(captured)
+    ) as client:
+        response = await client.post("https://api.test/v1/add", json={"a": [1, 2]})
+    assert response.status_code == 200
+    assert stdlib_json.loads(captured["body"]) == {"a": [1, 2]}
+    assert captured["content_type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_orjson_client_without_orjson_uses_stdlib_path(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(mem0_mixin, "orjson", None)
+    captured: dict = {}
+    async with mem0_mixin._OrjsonAsyncClient(
+        transport=_capture_transport(captured)
+    ) as client:
+        response = await client.post("https://api.test/v1/add", json={"b": True})
+    assert response.status_code == 200
+    assert stdlib_json.loads(captured["body"]) == {"b": True}
+
+
+class _FakeMem0:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    async def search(self, query: str, **kwargs):
+        self.calls.append((query, kwargs))
+        return [{"memory": f"result {len(self.calls)}"}]
+
+
+@pytest.fixture
+def fake_mem0(monkeypatch: pytest.MonkeyPatch) -> _FakeMem0:
+    fake = _FakeMem0()
+
+    async def fake_get_mem0():
+        return fake
+
+    monkeypatch.setattr(mem0_mixin, "get_mem0", fake_get_mem0)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_cached_search_serves_repeats_locally(fake_mem0: _FakeMem0) -> None:
+    filters = {"AND": [{"user_id": "user-a"}]}
+    first = await _cached_search("What is my name?", filters=filters, limit=5)
+    # Whitespace/case differences normalize to the same cache key
+    second = await _cached_search("what is  MY name?", filters=filters, limit=5)
+    assert first == second
+    assert len(fake_mem0.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_search_is_scoped_to_search_kwargs(fake_mem0: _FakeMem0) -> None:
+    query = "what is my name?"
+    a = await _cached_search(query, filters={"AND": [{"user_id": "user-a"}]}, limit=5)
+    b = await _cached_search(query, filters={"AND": [{"user_id": "user-b"}]}, limit=5)
+    # Same query for a different user id must not reuse the cached results
+    assert len(fake_mem0.calls) == 2
+    assert a != b
+
+
+@pytest.mark.asyncio
+async def test_cached_search_expires_after_ttl(
+    fake_mem0: _FakeMem0, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    filters = {"AND": [{"user_id": "user-a"}]}
+    await _cached_search("where do I live?", filters=filters)
+
+    real_monotonic = mem0_mixin.time.monotonic
+    monkeypatch.setattr(
+        mem0_mixin.time,
+        "monotonic",
+        lambda: real_monotonic() + mem0_mixin._SEARCH_CACHE_TTL + 1,
+    )
+    await _cached_search("where do I live?", filters=filters)
+    assert len(fake_mem0.calls) == 2